@@ -186,7 +186,12 @@ def delete_all():
         result = document_service.delete_all()
 
         models.load_vectorstore()
-        models.parent_store = ParentChunkStore(Config.PARENT_CHUNKS_DB_PATH)
+        # delete_all removed the database file along with chroma_db; reconnect
+        # the shared store in place (rag_service holds the same object)
+        if models.parent_store:
+            models.parent_store.reopen()
+        else:
+            models.parent_store = ParentChunkStore(Config.PARENT_CHUNKS_DB_PATH)
         document_service = DocumentService(models.vectorstore, models.parent_store)
 
         app_state["documents_processed"] = 0
@@ -24,6 +24,8 @@ class Config:
     # OCR settings
     OCR_DPI = int(os.getenv("OCR_DPI", 300))
     OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", 50))
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))  # Parallel tesseract processes
+    OCR_MAX_LONG_EDGE = int(os.getenv("OCR_MAX_LONG_EDGE", 4000))  # Larger scans are downscaled before OCR
 
     MIN_CHUNK_CHARS = 75   # Minimum characters for a valid chunk (filters garbage)
 
@@ -14,15 +14,14 @@ logger = logging.getLogger(__name__)
 class CoordinateParser:
     """Parse geographic coordinates from natural language text"""
 
-    def __init__(self):
-        # Coordinate format patterns
-        self.patterns = {
-            'decimal': r'(-?\d{1,3}\.\d{4,10})\s*[,\s]\s*(-?\d{1,3}\.\d{4,10})',
-            'decimal_labeled': r'(?:lat|latitude)[:\s]*(-?\d{1,3}\.\d{4,10})\s*[,\s]?\s*(?:lon|long|longitude)[:\s]*(-?\d{1,3}\.\d{4,10})',
-            'dms': r'(\d{1,3})[°]\s*(\d{1,2})[\'′]\s*(\d{1,2}(?:\.\d+)?)[\"″]?\s*([NSns])\s*[,\s]?\s*(\d{1,3})[°]\s*(\d{1,2})[\'′]\s*(\d{1,2}(?:\.\d+)?)[\"″]?\s*([EWew])',
-            'mgrs': r'\d{1,2}[A-Z]{3}\d{10}',  # Military Grid Reference System
-            'utm': r'(\d{1,2})\s*([A-Z])\s*(\d{6})\s*(\d{7})',  # UTM format
-        }
+    # Coordinate format patterns (compiled once at class load, shared by all instances)
+    patterns = {
+        'decimal': re.compile(r'(-?\d{1,3}\.\d{4,10})\s*[,\s]\s*(-?\d{1,3}\.\d{4,10})'),
+        'decimal_labeled': re.compile(r'(?:lat|latitude)[:\s]*(-?\d{1,3}\.\d{4,10})\s*[,\s]?\s*(?:lon|long|longitude)[:\s]*(-?\d{1,3}\.\d{4,10})', re.IGNORECASE),
+        'dms': re.compile(r'(\d{1,3})[°]\s*(\d{1,2})[\'′]\s*(\d{1,2}(?:\.\d+)?)[\"″]?\s*([NSns])\s*[,\s]?\s*(\d{1,3})[°]\s*(\d{1,2})[\'′]\s*(\d{1,2}(?:\.\d+)?)[\"″]?\s*([EWew])'),
+        'mgrs': re.compile(r'\d{1,2}[A-Z]{3}\d{10}'),  # Military Grid Reference System
+        'utm': re.compile(r'(\d{1,2})\s*([A-Z])\s*(\d{6})\s*(\d{7})'),  # UTM format
+    }
 
     def parse(self, text: str) -> Optional[Dict[str, float]]:
         """
@@ -36,6 +35,12 @@ class CoordinateParser:
         """
         text = text.strip()
 
+        # Fast path: bare "lat, lon" input needs no regex at all
+        result = self._parse_decimal_plain(text)
+        if result:
+            logger.info(f"Parsed decimal coordinates: {result}")
+            return result
+
         # Try decimal format (most common)
         result = self._parse_decimal(text)
         if result:
@@ -57,9 +62,31 @@ class CoordinateParser:
         logger.warning("No coordinates found in text")
         return None
 
+    @staticmethod
+    def _is_decimal_token(token: str) -> bool:
+        """Check token has the same shape the decimal pattern accepts (-DDD.DDDD)"""
+        whole, dot, frac = token.partition('.')
+        if whole.startswith('-'):
+            whole = whole[1:]
+        return (bool(dot) and 1 <= len(whole) <= 3 and 4 <= len(frac) <= 10
+                and whole.isdecimal() and frac.isdecimal())
+
+    def _parse_decimal_plain(self, text: str) -> Optional[Dict[str, float]]:
+        """Parse text that is exactly "lat, lon" without invoking the regex engine"""
+        parts = text.split(',')
+        if len(parts) != 2:
+            return None
+        lat_str, lon_str = parts[0].strip(), parts[1].strip()
+        if not (self._is_decimal_token(lat_str) and self._is_decimal_token(lon_str)):
+            return None
+        lat, lon = float(lat_str), float(lon_str)
+        if self._validate_coordinates(lat, lon):
+            return {'lat': lat, 'lon': lon}
+        return None
+
     def _parse_decimal(self, text: str) -> Optional[Dict[str, float]]:
         """Parse decimal degree coordinates (e.g., 40.7128, -74.0060)"""
-        match = re.search(self.patterns['decimal'], text)
+        match = self.patterns['decimal'].search(text)
         if match:
             lat, lon = float(match.group(1)), float(match.group(2))
             if self._validate_coordinates(lat, lon):
@@ -68,7 +95,7 @@ class CoordinateParser:
 
     def _parse_decimal_labeled(self, text: str) -> Optional[Dict[str, float]]:
         """Parse labeled decimal coordinates (e.g., lat: 40.7128, lon: -74.0060)"""
-        match = re.search(self.patterns['decimal_labeled'], text, re.IGNORECASE)
+        match = self.patterns['decimal_labeled'].search(text)
         if match:
             lat, lon = float(match.group(1)), float(match.group(2))
             if self._validate_coordinates(lat, lon):
@@ -77,7 +104,7 @@ class CoordinateParser:
 
     def _parse_dms(self, text: str) -> Optional[Dict[str, float]]:
         """Parse DMS format (e.g., 40°42'51"N, 74°00'21"W)"""
-        match = re.search(self.patterns['dms'], text)
+        match = self.patterns['dms'].search(text)
         if match:
             lat_deg, lat_min, lat_sec, lat_dir, lon_deg, lon_min, lon_sec, lon_dir = match.groups()
 
@@ -94,7 +121,8 @@ class CoordinateParser:
                 return {'lat': lat, 'lon': lon}
         return None
 
-    def _validate_coordinates(self, lat: float, lon: float) -> bool:
+    @staticmethod
+    def _validate_coordinates(lat: float, lon: float) -> bool:
         """Validate latitude and longitude ranges"""
         if not (-90 <= lat <= 90):
             logger.warning(f"Invalid latitude: {lat}")
@@ -1,6 +1,7 @@
 import logging
 import os
 import shutil
+from collections import Counter
 from datetime import datetime
 from langchain_community.document_loaders import PyPDFLoader
 from utils import (
@@ -229,8 +230,6 @@ class RAGService:
 
     def _create_terrain_summary(self, terrain_data, coords, radius_km):
         """Create a concise terrain summary for frontend display"""
-        from collections import Counter
-
         roads = terrain_data.get('roads', [])
 
         # Dynamically group roads by their actual types from the data
@@ -385,7 +384,6 @@ class RAGService:
         roads = terrain_data.get('roads', [])
         if roads:
             # Group roads by their actual type from the data
-            from collections import Counter
             road_type_counts = Counter(r['type'] for r in roads)
 
             intel_parts.append(f"\nAVENUES OF APPROACH ({len(roads)} road segments in {radius_km}km radius):")
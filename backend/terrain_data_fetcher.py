@@ -5,8 +5,16 @@ Used for OCOKA tactical analysis based on coordinates
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 import math
+import sys
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from typing import Dict, List, Optional
 import time
 
@@ -16,6 +24,84 @@ logger = logging.getLogger(__name__)
 _terrain_cache: Dict[str, Dict] = {}
 _cache_ttl = 3600  # 1 hour cache TTL
 
+# Shared HTTP session (persists across instances) so repeated calls to the
+# same API host reuse keep-alive connections instead of a new TCP/TLS handshake
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Radius-independent lookups (place name, weather) keyed by location only, so
+# re-querying the same point with a different radius skips those API calls
+_location_cache: Dict[str, Dict] = {}
+
+# Placeholder names assigned at ingest when an OSM feature has no name tag
+_WATERWAY_UNNAMED = frozenset(('Unnamed waterway',))
+_CROSSING_UNNAMED = frozenset(('Unnamed bridge', 'Ford crossing', 'Unnamed tunnel', 'Dam'))
+_MEDICAL_UNNAMED = frozenset(('Hospital', 'Medical clinic'))
+_SCHOOL_UNNAMED = frozenset(('School', 'University'))
+
+# Road/waterway type groupings used by the mobility and obstacle analysis
+_MAJOR_ROAD_TYPES = frozenset(('motorway', 'trunk', 'primary', 'secondary'))
+_MINOR_ROAD_TYPES = frozenset(('tertiary', 'residential'))
+_WATER_OBSTACLE_TYPES = frozenset(('river', 'canal'))
+
+# Elevation sample directions that lie on a diagonal from the center point
+_DIAGONAL_DIRECTIONS = frozenset(('NE', 'SE', 'SW', 'NW'))
+
+# Directional movement difficulty by slope percent (upper bounds, exclusive)
+_DIFFICULTY_SLOPE_BOUNDS = (10, 25, 45)
+_DIFFICULTY_LABELS = ('easy', 'moderate', 'difficult', 'very_difficult')
+
+# Pulls (type, name) out of a feature record in one C-level call
+_type_and_name = itemgetter('type', 'name')
+
+
+# Place names don't change, so Nominatim results are memoized for the life of
+# the process by rounded coordinates (~111m, same as the location cache key).
+# Failures raise instead of returning, so they are never cached.
+@lru_cache(maxsize=512)
+def _cached_reverse_geocode(lat: float, lon: float) -> Dict:
+    """Nominatim reverse geocode for rounded coordinates"""
+    url = "https://nominatim.openstreetmap.org/reverse"
+    params = {
+        'lat': lat,
+        'lon': lon,
+        'format': 'json',
+        'addressdetails': 1,
+        'zoom': 14
+    }
+    headers = {
+        'User-Agent': 'NATO-Tactical-Intelligence-Assistant/1.0'
+    }
+
+    response = _http.get(url, params=params, headers=headers, timeout=20)
+    response.raise_for_status()
+    data = response.json()
+
+    address = data.get('address', {})
+
+    place_parts = list(filter(None, [
+        address.get('suburb') or address.get('neighbourhood'),
+        address.get('city') or address.get('town') or address.get('village'),
+        address.get('state'),
+        address.get('country')
+    ]))
+
+    # No usable parts -> None; the caller falls back to its exact coordinates
+    place_name = ", ".join(place_parts) if place_parts else None
+    logger.info(f"Reverse geocoded: {place_name}")
+
+    return {
+        'place_name': place_name,
+        'address': {
+            'city': address.get('city') or address.get('town') or address.get('village'),
+            'state': address.get('state'),
+            'country': address.get('country'),
+            'country_code': address.get('country_code', '').upper(),
+            'suburb': address.get('suburb') or address.get('neighbourhood'),
+            'postcode': address.get('postcode')
+        }
+    }
+
 
 class TerrainDataFetcher:
     """Fetch real terrain data from geographic APIs with caching"""
@@ -24,13 +110,17 @@ class TerrainDataFetcher:
         """Initialize terrain data fetcher"""
         self.overpass_url = "https://overpass-api.de/api/interpreter"
 
-    def _get_cache_key(self, lat: float, lon: float, radius_km: float) -> str:
-        """Generate cache key from coordinates (rounded for cache hits)"""
+    def _get_location_key(self, lat: float, lon: float) -> str:
+        """Generate location key from coordinates (rounded for cache hits)"""
         # Round to 3 decimals (~111m precision) for reasonable cache hits
         lat_r = round(lat, 3)
         lon_r = round(lon, 3)
+        return f"{lat_r}_{lon_r}"
+
+    def _get_cache_key(self, lat: float, lon: float, radius_km: float) -> str:
+        """Generate cache key from coordinates and radius"""
         radius_r = round(radius_km, 1)
-        return f"{lat_r}_{lon_r}_{radius_r}"
+        return f"{self._get_location_key(lat, lon)}_{radius_r}"
 
     def fetch_terrain_data(self, lat: float, lon: float, radius_km: float = 5) -> Dict:
         """
@@ -88,13 +178,36 @@ class TerrainDataFetcher:
             'weather': {}  # Past week weather data
         }
 
+        # Place name and weather don't depend on radius - reuse them if this
+        # location was recently fetched at another radius
+        location_key = self._get_location_key(lat, lon)
+        location_info = _location_cache.get(location_key)
+        if location_info and time.time() - location_info['_cached_at'] >= _cache_ttl:
+            location_info = None
+
+        # The API lookups are independent of each other, so issue them
+        # concurrently - total latency is then bounded by the slowest service
+        # (usually Overpass) rather than the sum of all of them
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            elevation_future = executor.submit(self._fetch_elevation, lat, lon, radius_km)
+            osm_future = executor.submit(self._fetch_osm_features, lat, lon, radius_km)
+            if location_info:
+                logger.info(f"Reusing place name and weather for {lat}, {lon}")
+                place_info = location_info['place_info']
+                weather = location_info['weather']
+            else:
+                place_future = executor.submit(self._reverse_geocode, lat, lon)
+                weather_future = executor.submit(self._fetch_weather, lat, lon)
+                place_info = place_future.result()
+                weather = weather_future.result()
+            elevation_data = elevation_future.result()
+            osm_data = osm_future.result()
+
         #Reverse geocoding - Get place names
-        place_info = self._reverse_geocode(lat, lon)
         terrain_data['place_name'] = place_info.get('place_name')
         terrain_data['address'] = place_info.get('address', {})
 
         #Elevation data (Open-Meteo API)
-        elevation_data = self._fetch_elevation(lat, lon, radius_km)
         terrain_data['elevation'] = elevation_data.get('center_elevation')
         terrain_data['nearby_elevations'] = elevation_data.get('nearby_elevations', [])
 
@@ -107,7 +220,6 @@ class TerrainDataFetcher:
             )
 
         # Infrastructure and terrain features (OpenStreetMap)
-        osm_data = self._fetch_osm_features(lat, lon, radius_km)
         terrain_data['roads'] = osm_data.get('roads', [])
         terrain_data['waterways'] = osm_data.get('waterways', [])
         terrain_data['waterway_summary'] = self._summarize_waterways(terrain_data['waterways'])
@@ -143,8 +255,15 @@ class TerrainDataFetcher:
         # Calculate movement times across the area
         terrain_data['movement_times'] = self._calculate_movement_times(terrain_data)
 
-        # Fetch weather data (past week)
-        terrain_data['weather'] = self._fetch_weather(lat, lon)
+        # Weather data (past week)
+        terrain_data['weather'] = weather
+        # Only keep successful lookups so a transient failure is retried
+        if not location_info and place_info.get('address') and weather:
+            _location_cache[location_key] = {
+                'place_info': place_info,
+                'weather': weather,
+                '_cached_at': time.time()
+            }
 
         # Cache the result
         terrain_data['_cached_at'] = time.time()
@@ -162,46 +281,11 @@ class TerrainDataFetcher:
             Dict with place_name and address components
         """
         try:
-            url = "https://nominatim.openstreetmap.org/reverse"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'format': 'json',
-                'addressdetails': 1,
-                'zoom': 14
-            }
-            headers = {
-                'User-Agent': 'NATO-Tactical-Intelligence-Assistant/1.0'
-            }
-
-            response = requests.get(url, params=params, headers=headers, timeout=20)
-            response.raise_for_status()
-            data = response.json()
-
-            address = data.get('address', {})
-
-            place_parts = list(filter(None, [
-                address.get('suburb') or address.get('neighbourhood'),
-                address.get('city') or address.get('town') or address.get('village'),
-                address.get('state'),
-                address.get('country')
-            ]))
-
-            place_name = ", ".join(place_parts) if place_parts else f"{lat}, {lon}"
-            logger.info(f"Reverse geocoded: {place_name}")
-
-            return {
-                'place_name': place_name,
-                'address': {
-                    'city': address.get('city') or address.get('town') or address.get('village'),
-                    'state': address.get('state'),
-                    'country': address.get('country'),
-                    'country_code': address.get('country_code', '').upper(),
-                    'suburb': address.get('suburb') or address.get('neighbourhood'),
-                    'postcode': address.get('postcode')
-                }
-            }
-
+            place_info = _cached_reverse_geocode(round(lat, 3), round(lon, 3))
+            if place_info['place_name'] is None:
+                # Copy so the memoized result is left untouched
+                place_info = {**place_info, 'place_name': f"{lat}, {lon}"}
+            return place_info
         except Exception as e:
             logger.warning(f"Reverse geocoding failed: {e}")
             return {
@@ -243,7 +327,7 @@ class TerrainDataFetcher:
                 'longitude': ','.join(str(round(l, 6)) for l in all_lons),
             }
 
-            response = requests.get(url, params=params, timeout=15)
+            response = _http.get(url, params=params, timeout=15)
             response.raise_for_status()
             data = response.json()
 
@@ -306,7 +390,7 @@ class TerrainDataFetcher:
                 'timezone': 'auto'
             }
 
-            response = requests.get(url, params=params, timeout=30)
+            response = _http.get(url, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
 
@@ -426,7 +510,7 @@ class TerrainDataFetcher:
             rise = elev - center_elev  # Positive = uphill from center
             # Calculate actual distance using Pythagorean theorem for diagonal directions
             direction = point.get('direction', '')
-            if direction in ['NE', 'SE', 'SW', 'NW']:
+            if direction in _DIAGONAL_DIRECTIONS:
                 actual_distance = distance_m * 1.414  # Diagonal
             else:
                 actual_distance = distance_m
@@ -473,7 +557,8 @@ class TerrainDataFetcher:
         Returns:
             Dict with roads, waterways, buildings, forests, landuse, crossings,
             railways, power_lines, cell_towers, fuel_stations, medical_facilities,
-            schools, helipads
+            schools, helipads. Every record that carries a name always has a
+            'name' key, falling back to a per-category placeholder.
         """
         radius_m = radius_km * 1000
 
@@ -577,7 +662,7 @@ class TerrainDataFetcher:
         """
 
         try:
-            response = requests.post(
+            response = _http.post(
                 self.overpass_url,
                 data={'data': query},
                 timeout=200
@@ -602,13 +687,17 @@ class TerrainDataFetcher:
                 'helipads': []
             }
 
+            # OSM type tags come from a small vocabulary; intern them so the
+            # Counter/set lookups in the summarizers compare by identity
+            intern = sys.intern
+
             for element in data.get('elements', []):
                 tags = element.get('tags', {})
 
                 # Roads
                 if 'highway' in tags:
                     features['roads'].append({
-                        'type': tags['highway'],
+                        'type': intern(tags['highway']),
                         'name': tags.get('name', 'Unnamed road'),
                         'surface': tags.get('surface', 'unknown')
                     })
@@ -616,7 +705,7 @@ class TerrainDataFetcher:
                 # Waterways
                 if 'waterway' in tags and tags['waterway'] not in ['dam']:
                     features['waterways'].append({
-                        'type': tags['waterway'],
+                        'type': intern(tags['waterway']),
                         'name': tags.get('name', 'Unnamed waterway'),
                         'width': tags.get('width', 'unknown')
                     })
@@ -624,7 +713,7 @@ class TerrainDataFetcher:
                 # Buildings
                 if 'building' in tags:
                     features['buildings'].append({
-                        'type': tags.get('building', 'yes')
+                        'type': intern(tags.get('building', 'yes'))
                     })
 
                 # Forests
@@ -637,7 +726,7 @@ class TerrainDataFetcher:
                 # Landuse
                 if 'landuse' in tags:
                     features['landuse'].append({
-                        'type': tags['landuse']
+                        'type': intern(tags['landuse'])
                     })
 
                 # CROSSINGS (bridges, fords, tunnels, dams)
@@ -645,7 +734,7 @@ class TerrainDataFetcher:
                     features['crossings'].append({
                         'type': 'bridge',
                         'name': tags.get('name', 'Unnamed bridge'),
-                        'road_type': tags.get('highway', 'unknown'),
+                        'road_type': intern(tags.get('highway', 'unknown')),
                         'capacity': 'heavy' if tags.get('highway') in ['motorway', 'trunk', 'primary'] else 'medium'
                     })
 
@@ -673,7 +762,7 @@ class TerrainDataFetcher:
                 # RAILWAYS (obstacles)
                 if 'railway' in tags and tags['railway'] in ['rail', 'light_rail', 'narrow_gauge']:
                     features['railways'].append({
-                        'type': tags['railway'],
+                        'type': intern(tags['railway']),
                         'name': tags.get('name', 'Railway line'),
                         'electrified': tags.get('electrified', 'unknown')
                     })
@@ -742,7 +831,7 @@ class TerrainDataFetcher:
                 # HELIPADS (aviation LZ)
                 if tags.get('aeroway') in ['helipad', 'heliport']:
                     features['helipads'].append({
-                        'type': tags['aeroway'],
+                        'type': intern(tags['aeroway']),
                         'name': tags.get('name', 'Helipad'),
                         'surface': tags.get('surface', 'unknown')
                     })
@@ -771,56 +860,76 @@ class TerrainDataFetcher:
                 'schools': [], 'helipads': []
             }
 
-    def _summarize_waterways(self, waterways: List[Dict]) -> Dict:
+    def _summarize_by_type(self, items: List[Dict], unnamed_defaults: frozenset,
+                           cap: Optional[int] = None,
+                           count_unnamed: bool = False) -> Dict:
         """
-        Deduplicate waterway segments into distinct named features grouped by type.
+        Deduplicate feature segments into distinct named features grouped by type.
 
-        OSM represents a single river as many way-segments. This method collapses
-        those segments so consumers see "7 rivers" instead of "72 river segments".
+        Shared by the per-category summarizers. Names found in unnamed_defaults
+        (the placeholder names assigned at ingest) are not counted as named.
+
+        Args:
+            items: Feature dicts with 'type' and 'name' (always set at ingest)
+            unnamed_defaults: Placeholder names to treat as unnamed
+            cap: Maximum number of names to list per type (None = no cap)
+            count_unnamed: Also report segments without a distinct name
 
         Returns:
-            Dict with per-type lists of unique named waterways plus segment counts.
+            Dict with per-type distinct named features plus segment counts.
         """
-        from collections import Counter
-
-        segments_by_type = Counter(w['type'] for w in waterways)
-
-        # Collect unique named waterways per type
+        segments_by_type: Counter = Counter()
+        named_segments: Counter = Counter()  # segments carrying a real name
         seen: Dict[str, set] = {}
-        for w in waterways:
-            wtype = w['type']
-            name = w.get('name', '')
-            if name and name not in ('Unnamed waterway', ''):
-                seen.setdefault(wtype, set()).add(name)
-
-        named_by_type: Dict[str, List[str]] = {
-            wtype: sorted(names) for wtype, names in seen.items()
-        }
+        for itype, name in map(_type_and_name, items):
+            segments_by_type[itype] += 1
+            if name and name not in unnamed_defaults:
+                seen.setdefault(itype, set()).add(name)
+                named_segments[itype] += 1
 
-        # Build summary
         summary: Dict = {
-            'total_segments': len(waterways),
+            'total_segments': len(items),
             'segments_by_type': dict(segments_by_type),
             'distinct_named': {},
             'total_distinct_named': 0,
         }
 
         total_named = 0
-        for wtype in sorted(segments_by_type.keys()):
-            names = named_by_type.get(wtype, [])
-            summary['distinct_named'][wtype] = {
+        unnamed_total = 0
+        for itype in sorted(segments_by_type.keys()):
+            names = sorted(seen.get(itype, []))
+            summary['distinct_named'][itype] = {
                 'count': len(names),
-                'names': names,
+                'names': names[:cap] if cap is not None else names,
             }
             total_named += len(names)
+            if count_unnamed:
+                unnamed_total += segments_by_type[itype] - named_segments[itype]
 
         summary['total_distinct_named'] = total_named
+        if count_unnamed:
+            summary['unnamed_segments'] = unnamed_total
 
-        logger.info(
-            f"Waterway summary: {len(waterways)} segments -> "
-            f"{total_named} distinct named features "
-            f"({', '.join(f'{v} {k}' for k, v in segments_by_type.items())})"
-        )
+        return summary
+
+    def _summarize_waterways(self, waterways: List[Dict]) -> Dict:
+        """
+        Deduplicate waterway segments into distinct named features grouped by type.
+
+        OSM represents a single river as many way-segments. This method collapses
+        those segments so consumers see "7 rivers" instead of "72 river segments".
+
+        Returns:
+            Dict with per-type lists of unique named waterways plus segment counts.
+        """
+        summary = self._summarize_by_type(waterways, _WATERWAY_UNNAMED)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Waterway summary: {len(waterways)} segments -> "
+                f"{summary['total_distinct_named']} distinct named features "
+                f"({', '.join(f'{v} {k}' for k, v in summary['segments_by_type'].items())})"
+            )
 
         return summary
 
@@ -869,42 +978,14 @@ class TerrainDataFetcher:
         Returns:
             Dict with per-type counts and distinct named crossings.
         """
-        from collections import Counter
-
-        segments_by_type = Counter(c['type'] for c in crossings)
-
-        # Collect unique named crossings per type
-        seen: Dict[str, set] = {}
-        unnamed_defaults = ('Unnamed bridge', 'Ford crossing', 'Unnamed tunnel', 'Dam')
-        for c in crossings:
-            ctype = c['type']
-            name = c.get('name', '')
-            if name and name not in unnamed_defaults and name != '':
-                seen.setdefault(ctype, set()).add(name)
-
-        summary: Dict = {
-            'total_segments': len(crossings),
-            'segments_by_type': dict(segments_by_type),
-            'distinct_named': {},
-            'total_distinct_named': 0,
-        }
-
-        total_named = 0
-        for ctype in sorted(segments_by_type.keys()):
-            names = sorted(seen.get(ctype, []))
-            summary['distinct_named'][ctype] = {
-                'count': len(names),
-                'names': names,
-            }
-            total_named += len(names)
+        summary = self._summarize_by_type(crossings, _CROSSING_UNNAMED)
 
-        summary['total_distinct_named'] = total_named
-
-        logger.info(
-            f"Crossing summary: {len(crossings)} segments -> "
-            f"{total_named} distinct named crossings "
-            f"({', '.join(f'{v} {k}' for k, v in segments_by_type.items())})"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Crossing summary: {len(crossings)} segments -> "
+                f"{summary['total_distinct_named']} distinct named crossings "
+                f"({', '.join(f'{v} {k}' for k, v in summary['segments_by_type'].items())})"
+            )
 
         return summary
 
@@ -953,50 +1034,16 @@ class TerrainDataFetcher:
         Returns:
             Dict with per-type distinct named facilities plus segment counts.
         """
-        from collections import Counter
-
-        segments_by_type = Counter(m['type'] for m in medical_facilities)
-
-        # Collect unique named facilities per type
-        seen: Dict[str, set] = {}
-        unnamed_defaults = ('Hospital', 'Medical clinic')
-        for m in medical_facilities:
-            mtype = m['type']
-            name = m.get('name', '')
-            if name and name not in unnamed_defaults and name != '':
-                seen.setdefault(mtype, set()).add(name)
-
-        summary: Dict = {
-            'total_segments': len(medical_facilities),
-            'segments_by_type': dict(segments_by_type),
-            'distinct_named': {},
-            'total_distinct_named': 0,
-        }
+        summary = self._summarize_by_type(
+            medical_facilities, _MEDICAL_UNNAMED, cap=20, count_unnamed=True
+        )
 
-        total_named = 0
-        unnamed_total = 0
-        for mtype in sorted(segments_by_type.keys()):
-            names = sorted(seen.get(mtype, []))
-            seg_count = segments_by_type[mtype]
-            unnamed_count = seg_count - sum(
-                1 for m in medical_facilities
-                if m['type'] == mtype and m.get('name', '') in seen.get(mtype, set())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Medical summary: {len(medical_facilities)} segments -> "
+                f"{summary['total_distinct_named']} distinct named facilities "
+                f"({', '.join(f'{v} {k}' for k, v in summary['segments_by_type'].items())})"
             )
-            summary['distinct_named'][mtype] = {
-                'count': len(names),
-                'names': names[:20],  # cap list for readability
-            }
-            total_named += len(names)
-            unnamed_total += max(unnamed_count, 0)
-
-        summary['total_distinct_named'] = total_named
-        summary['unnamed_segments'] = unnamed_total
-
-        logger.info(
-            f"Medical summary: {len(medical_facilities)} segments -> "
-            f"{total_named} distinct named facilities "
-            f"({', '.join(f'{v} {k}' for k, v in segments_by_type.items())})"
-        )
 
         return summary
 
@@ -1010,50 +1057,16 @@ class TerrainDataFetcher:
         Returns:
             Dict with per-type distinct named schools plus segment counts.
         """
-        from collections import Counter
-
-        segments_by_type = Counter(s['type'] for s in schools)
-
-        # Collect unique named schools per type
-        seen: Dict[str, set] = {}
-        unnamed_defaults = ('School', 'University')
-        for s in schools:
-            stype = s['type']
-            name = s.get('name', '')
-            if name and name not in unnamed_defaults and name != '':
-                seen.setdefault(stype, set()).add(name)
-
-        summary: Dict = {
-            'total_segments': len(schools),
-            'segments_by_type': dict(segments_by_type),
-            'distinct_named': {},
-            'total_distinct_named': 0,
-        }
+        summary = self._summarize_by_type(
+            schools, _SCHOOL_UNNAMED, cap=20, count_unnamed=True
+        )
 
-        total_named = 0
-        unnamed_total = 0
-        for stype in sorted(segments_by_type.keys()):
-            names = sorted(seen.get(stype, []))
-            seg_count = segments_by_type[stype]
-            unnamed_count = seg_count - sum(
-                1 for s in schools
-                if s['type'] == stype and s.get('name', '') in seen.get(stype, set())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"School summary: {len(schools)} segments -> "
+                f"{summary['total_distinct_named']} distinct named schools "
+                f"({', '.join(f'{v} {k}' for k, v in summary['segments_by_type'].items())})"
             )
-            summary['distinct_named'][stype] = {
-                'count': len(names),
-                'names': names[:20],  # cap list for readability
-            }
-            total_named += len(names)
-            unnamed_total += max(unnamed_count, 0)
-
-        summary['total_distinct_named'] = total_named
-        summary['unnamed_segments'] = unnamed_total
-
-        logger.info(
-            f"School summary: {len(schools)} segments -> "
-            f"{total_named} distinct named schools "
-            f"({', '.join(f'{v} {k}' for k, v in segments_by_type.items())})"
-        )
 
         return summary
 
@@ -1075,6 +1088,10 @@ class TerrainDataFetcher:
         if not center_elev or not nearby_elevs:
             return los_analysis
 
+        # Vegetation/building obstruction factor
+        # More forests/buildings = more likely blocked
+        obstruction_factor = min(1.0, (len(forests) + len(buildings)) / 100)
+
         # Analyze LOS in each direction
         clear_directions = 0
         blocked_directions = 0
@@ -1091,10 +1108,6 @@ class TerrainDataFetcher:
             elevation_diff = elev - center_elev
             has_los = elevation_diff <= 5  # Can see if target is within 5m above
 
-            # Vegetation/building obstruction factor
-            # More forests/buildings = more likely blocked
-            obstruction_factor = min(1.0, (len(forests) + len(buildings)) / 100)
-
             if has_los and obstruction_factor < 0.7:
                 los_analysis['directions'][direction] = {
                     'visibility': 'clear',
@@ -1158,7 +1171,7 @@ class TerrainDataFetcher:
         center_elev = terrain_data.get('elevation')
         nearby_elevs = terrain_data.get('nearby_elevations', [])
         if center_elev and nearby_elevs:
-            elevations = [e.get('elevation', 0) for e in nearby_elevs if e.get('elevation')]
+            elevations = [e['elevation'] for e in nearby_elevs if e.get('elevation')]
             if elevations:
                 avg_nearby = sum(elevations) / len(elevations)
                 if center_elev > avg_nearby + 10:
@@ -1188,7 +1201,7 @@ class TerrainDataFetcher:
         # Obstacles
         waterways = terrain_data.get('waterways', [])
         for waterway in waterways:
-            if waterway['type'] in ['river', 'canal']:
+            if waterway['type'] in _WATER_OBSTACLE_TYPES:
                 analysis['obstacles'].append(f"Water obstacle: {waterway['name']}")
 
         # Crossing points (NEW)
@@ -1199,10 +1212,10 @@ class TerrainDataFetcher:
                 crossing_info += f" ({crossing['capacity']})"
             analysis['crossing_points'].append(crossing_info)
 
-        # Avenues of approach
+        # Avenues of approach (first 5 major roads, stop scanning once found)
         roads = terrain_data.get('roads', [])
-        major_roads = [r for r in roads if r['type'] in ['motorway', 'trunk', 'primary', 'secondary']]
-        for road in major_roads[:5]:
+        major_roads = (r for r in roads if r['type'] in _MAJOR_ROAD_TYPES)
+        for road in islice(major_roads, 5):
             analysis['avenues_of_approach'].append(f"{road['type'].title()}: {road['name']}")
 
         # Urban terrain
@@ -1274,12 +1287,11 @@ class TerrainDataFetcher:
             'directional_analysis': {}
         }
 
+        # Determine if primarily road or cross-country movement
+        has_good_roads = any(r['type'] in _MAJOR_ROAD_TYPES for r in roads)
+
         # Calculate times for each unit type
         for unit_type, speeds in base_speeds.items():
-            # Determine if primarily road or cross-country movement
-            has_good_roads = len([r for r in roads if r['type'] in
-                                  ['motorway', 'trunk', 'primary', 'secondary']]) > 0
-
             if has_good_roads and modifiers['road_network'] > 0.5:
                 effective_speed = speeds['road'] * modifiers['overall']
                 movement_mode = 'road_march'
@@ -1306,6 +1318,10 @@ class TerrainDataFetcher:
         # Calculate directional movement times (based on slope)
         direction_slopes = slope_data.get('direction_slopes', {})
         if direction_slopes:
+            # Infantry cross-country speed through vegetation, before slope
+            infantry_base_speed = (base_speeds['dismounted_infantry']['cross_country']
+                                   * modifiers['vegetation'])
+
             for direction, slope_info in direction_slopes.items():
                 slope_pct = abs(slope_info.get('slope_percent', 0))
                 uphill = slope_info.get('direction') == 'uphill'
@@ -1319,15 +1335,14 @@ class TerrainDataFetcher:
                     slope_modifier = min(1.1, 1 + (slope_pct / 200)) if slope_pct < 30 else 0.8
 
                 # Infantry time for this direction
-                infantry_speed = base_speeds['dismounted_infantry']['cross_country']
-                dir_speed = infantry_speed * slope_modifier * modifiers['vegetation']
+                dir_speed = infantry_base_speed * slope_modifier
                 dir_time = (radius_km / dir_speed) * 60  # minutes
 
                 movement_times['directional_analysis'][direction] = {
                     'slope_percent': slope_info.get('slope_percent', 0),
                     'terrain_direction': slope_info.get('direction', 'flat'),
                     'infantry_time_minutes': round(dir_time, 0),
-                    'difficulty': 'easy' if slope_pct < 10 else 'moderate' if slope_pct < 25 else 'difficult' if slope_pct < 45 else 'very_difficult'
+                    'difficulty': _DIFFICULTY_LABELS[bisect_right(_DIFFICULTY_SLOPE_BOUNDS, slope_pct)]
                 }
 
         # Summary assessment
@@ -1401,10 +1416,8 @@ class TerrainDataFetcher:
             modifiers['urban'] = 0.5
 
         # Road network quality
-        major_roads = len([r for r in roads if r['type'] in
-                          ['motorway', 'trunk', 'primary', 'secondary']])
-        minor_roads = len([r for r in roads if r['type'] in
-                          ['tertiary', 'residential']])
+        major_roads = sum(1 for r in roads if r['type'] in _MAJOR_ROAD_TYPES)
+        minor_roads = sum(1 for r in roads if r['type'] in _MINOR_ROAD_TYPES)
 
         if major_roads > 3:
             modifiers['road_network'] = 1.0
@@ -1418,7 +1431,7 @@ class TerrainDataFetcher:
             modifiers['road_network'] = 0.2
 
         # Water obstacles (rivers/canals without bridges = significant delay)
-        river_count = len([w for w in waterways if w['type'] in ['river', 'canal']])
+        river_count = sum(1 for w in waterways if w['type'] in _WATER_OBSTACLE_TYPES)
         if river_count == 0:
             modifiers['water_obstacles'] = 1.0
         elif river_count < 2:
@@ -1439,13 +1452,17 @@ class TerrainDataFetcher:
 
     def clear_cache(self):
         """Clear the terrain data cache"""
-        global _terrain_cache
+        global _terrain_cache, _location_cache
         _terrain_cache = {}
+        _location_cache = {}
+        _cached_reverse_geocode.cache_clear()
         logger.info("Terrain cache cleared")
 
 
-# Convenience function
+# Convenience function (shares one fetcher instance across calls)
+_default_fetcher = TerrainDataFetcher()
+
+
 def get_terrain_data(lat: float, lon: float, radius_km: float = 5) -> Dict:
     """Get terrain data for coordinates (convenience wrapper)"""
-    fetcher = TerrainDataFetcher()
-    return fetcher.fetch_terrain_data(lat, lon, radius_km)
+    return _default_fetcher.fetch_terrain_data(lat, lon, radius_km)
@@ -1,9 +1,16 @@
+import bisect
+import io
 import logging
 import sqlite3
 import os
+import re
+import subprocess
+import threading
 import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
-from pdf2image import convert_from_path
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from PIL import Image, ImageFilter, ImageStat
+from pdf2image import convert_from_path, pdfinfo_from_path
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config import Config
@@ -12,21 +19,46 @@ logger = logging.getLogger(__name__)
 
 # ============== OCR & Image Processing ==============
 
+@lru_cache(maxsize=256)
+def _contrast_brightness_lut(mean):
+    """Lookup table equal to ImageEnhance.Contrast(2.5) then Brightness(1.2)
+    on a grayscale image whose rounded mean level is `mean`."""
+    lut = []
+    for x in range(256):
+        y = mean + 2.5 * (x - mean)
+        y = 0 if y <= 0 else 255 if y >= 255 else int(y)
+        lut.append(min(255, int(1.2 * y)))
+    return lut
+
+
 def preprocess_image_for_ocr(img):
     """Enhance image for better OCR results"""
     try:
-        img = img.convert('L')
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(2.5)
-        enhancer = ImageEnhance.Brightness(img)
-        img = enhancer.enhance(1.2)
+        if img.mode != 'L':
+            img = img.convert('L')
+
+        # Oversized scans cost tesseract time without adding legibility, so
+        # shrink them first (box filter averages pixels - good for downscaling)
+        long_edge = max(img.size)
+        if long_edge > Config.OCR_MAX_LONG_EDGE:
+            scale = Config.OCR_MAX_LONG_EDGE / long_edge
+            new_size = (max(1, int(img.size[0] * scale)), max(1, int(img.size[1] * scale)))
+            img = img.resize(new_size, Image.Resampling.BOX)
+            logger.info(f"Downscaled image to {new_size}")
+
+        # Contrast and brightness fused into one point() pass - same pixels as
+        # the two ImageEnhance blends without their degenerate images
+        mean = int(ImageStat.Stat(img).mean[0] + 0.5)
+        img = img.point(_contrast_brightness_lut(mean))
         img = img.filter(ImageFilter.SHARPEN)
         
-        if img.size[0] < 1500 or img.size[1] < 1500:
-            scale_factor = 2
-            new_size = (img.size[0] * scale_factor, img.size[1] * scale_factor)
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-            logger.info(f"Upscaled image to {new_size}")
+        if min(img.size) < 1500:
+            # Up to 2x, but never past the long-edge cap
+            scale_factor = min(2, Config.OCR_MAX_LONG_EDGE / max(img.size))
+            if scale_factor > 1:
+                new_size = (int(img.size[0] * scale_factor), int(img.size[1] * scale_factor))
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
+                logger.info(f"Upscaled image to {new_size}")
         
         return img
     except Exception as e:
@@ -34,10 +66,78 @@ def preprocess_image_for_ocr(img):
         raise
 
 
+# Extensions extract_text_with_ocr handles as single images
+_IMAGE_EXTS = frozenset(('.jpg', '.jpeg', '.png', '.bmp', '.tiff'))
+
+# Tesseract options per page segmentation mode, built once
+_OCR_CONFIGS = {psm: f'--psm {psm} --oem 3' for psm in ('1', '3', '4', '6')}
+
+
+def _tesseract_to_string(img, config):
+    """Same as pytesseract.image_to_string(img, lang='eng', config=config),
+    with the tesseract process held to one OpenMP thread.
+
+    OCR runs several tesseract processes side by side (pages, PSM sweep), and
+    each would otherwise start one thread per core. pytesseract always hands
+    tesseract this process's own environment, so the binary is run directly
+    to scope the limit to it - the server's torch/OpenMP threads are untouched.
+    An OMP_THREAD_LIMIT already set in the environment wins.
+    """
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    env = dict(os.environ)
+    env.setdefault("OMP_THREAD_LIMIT", "1")
+    proc = subprocess.run(
+        [pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '-l', 'eng', *config.split()],
+        input=buf.getvalue(),
+        capture_output=True,
+        env=env
+    )
+    if proc.returncode:
+        raise pytesseract.TesseractError(proc.returncode, proc.stderr.decode('utf-8', 'replace').strip())
+    return proc.stdout.decode('utf-8')
+
+
+def _render_pdf_page(filepath, page_num):
+    """Rasterize one PDF page (1-based), retrying at 200 DPI on failure"""
+    try:
+        return convert_from_path(filepath, dpi=Config.OCR_DPI, first_page=page_num, last_page=page_num)[0]
+    except Exception:
+        logger.warning(f"Page {page_num} failed at {Config.OCR_DPI} DPI, trying 200 DPI")
+        return convert_from_path(filepath, dpi=200, first_page=page_num, last_page=page_num)[0]
+
+
+def _ocr_page(args):
+    """Render and OCR one PDF page.
+
+    Returns (text block with page banner, text extracted flag, error flag).
+    """
+    filepath, i = args
+    try:
+        img_processed = preprocess_image_for_ocr(_render_pdf_page(filepath, i + 1))
+    except Exception as e:
+        logger.error(f"Error on page {i+1}: {e}")
+        return f"[Error: {e}]\n", False, True
+
+    # Banner goes in before OCR so a tesseract failure still marks the page
+    # (services.py builds page offsets from these banners)
+    text = f"\n{'='*50}\nPAGE {i+1}\n{'='*50}\n\n"
+    try:
+        page_text = _tesseract_to_string(img_processed, _OCR_CONFIGS['6'])
+    except Exception as e:
+        logger.error(f"Error on page {i+1}: {e}")
+        return text + f"[Error: {e}]\n", False, True
+
+    if page_text.strip():
+        return text + page_text, True, False
+    return text + "[No text extracted]\n", False, False
+
+
 def extract_text_with_ocr(filepath):
     """Extract text from image or PDF using OCR"""
+    ext = os.path.splitext(filepath)[1].lower()
     try:
-        if filepath.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff')):
+        if ext in _IMAGE_EXTS:
             logger.info(f"Processing image with OCR: {filepath}")
             img = Image.open(filepath)
             logger.info(f"Original image size: {img.size}")
@@ -51,62 +151,55 @@ def extract_text_with_ocr(filepath):
                 ('1', 'automatic with OSD')
             ]
             
-            best_text = ""
-            best_mode = None
-            
-            for psm, desc in psm_modes:
+            def run_psm(psm):
                 try:
-                    text = pytesseract.image_to_string(
-                        img_processed,
-                        lang='eng',
-                        config=f'--psm {psm} --oem 3'
-                    )
-                    
-                    if len(text.strip()) > len(best_text.strip()):
-                        best_text = text
-                        best_mode = psm
+                    return _tesseract_to_string(img_processed, _OCR_CONFIGS[psm])
                 except Exception as e:
                     logger.warning(f"PSM mode {psm} failed: {e}")
-                    continue
-            
+                    return None
+
+            # Each mode is a separate tesseract run on the same image, so
+            # sweep them concurrently instead of one after another
+            with ThreadPoolExecutor(max_workers=len(psm_modes)) as executor:
+                results = list(executor.map(run_psm, [psm for psm, _ in psm_modes]))
+
+            best_text = ""
+            best_mode = None
+
+            # Keep the first longest result, same tie-break as the mode order
+            for (psm, desc), text in zip(psm_modes, results):
+                if text is not None and len(text.strip()) > len(best_text.strip()):
+                    best_text = text
+                    best_mode = psm
+
             logger.info(f"Best OCR result from PSM {best_mode}: {len(best_text)} chars")
             return best_text, 1
         
-        elif filepath.lower().endswith('.pdf'):
+        elif ext == '.pdf':
             logger.info(f"Processing PDF with OCR: {filepath}")
             
-            try:
-                images = convert_from_path(filepath, dpi=Config.OCR_DPI)
-            except Exception as e:
-                logger.warning(f"Failed at {Config.OCR_DPI} DPI, trying 200 DPI")
-                images = convert_from_path(filepath, dpi=200)
-            
-            text = ""
-            successful_pages = 0
-            
-            for i, image in enumerate(images):
-                try:
-                    img_processed = preprocess_image_for_ocr(image)
-                    text += f"\n{'='*50}\nPAGE {i+1}\n{'='*50}\n\n"
-                    
-                    page_text = pytesseract.image_to_string(
-                        img_processed,
-                        lang='eng',
-                        config='--psm 6 --oem 3'
-                    )
-                    
-                    if page_text.strip():
-                        text += page_text
-                        successful_pages += 1
-                    else:
-                        text += "[No text extracted]\n"
-                        
-                except Exception as e:
-                    logger.error(f"Error on page {i+1}: {e}")
-                    text += f"[Error: {e}]\n"
-            
-            logger.info(f"Extracted {len(text)} chars from {successful_pages}/{len(images)} pages")
-            return text, len(images)
+            page_count = pdfinfo_from_path(filepath)["Pages"]
+
+            # Pages are independent and each tesseract call is its own
+            # process, so threads are enough to keep every core busy. Each
+            # worker rasterizes its own page, so rendering overlaps OCR and
+            # only about OCR_WORKERS page images are in memory at once
+            with ThreadPoolExecutor(max_workers=Config.OCR_WORKERS) as executor:
+                results = list(executor.map(_ocr_page, ((filepath, i) for i in range(page_count))))
+
+            # A PDF that pdfinfo reads but that fails on every page would
+            # otherwise "succeed" with nothing but [Error: ...] lines
+            if results and all(failed for _, _, failed in results):
+                raise ValueError(f"OCR failed on all {page_count} pages")
+
+            text = "".join(page_text for page_text, _, _ in results)
+            successful_pages = sum(ok for _, ok, _ in results)
+
+            logger.info(f"Extracted {len(text)} chars from {successful_pages}/{page_count} pages")
+            return text, page_count
+
+        else:
+            raise ValueError(f"Unsupported file type for OCR: {ext or filepath}")
         
     except Exception as e:
         logger.error(f"OCR failed: {e}")
@@ -120,10 +213,30 @@ def has_meaningful_text(documents, min_chars=None):
 
     if not documents:
         return False
+    # Per-page stripped lengths are a lower bound on the stripped total, so
+    # a real document is accepted without joining every page
+    stripped_chars = 0
+    for doc in documents:
+        stripped_chars += len(doc.page_content.strip())
+        if stripped_chars >= min_chars:
+            return True
     total_text = "".join(doc.page_content for doc in documents)
     return len(total_text.strip()) >= min_chars
 
 
+# Page header/footer lines like "ATP 2-01.3 iii" or "1 March 2019 ATP 2-01.3 v"
+_PAGE_HEADER_RE = re.compile(
+    r'^(?:[\divxlc\s\-]*ATP\s+\d[\d\-\.]*[\divxlc\s]*$'
+    r'|\d+\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\s+ATP)',
+    re.IGNORECASE
+)
+_EXCESS_NEWLINES_RE = re.compile(r'\n{3,}')
+
+# str.translate table that drops control characters (ASCII 0-31 except
+# tab \t=9 and newline \n=10)
+_CTRL_TABLE = dict.fromkeys([i for i in range(32) if i not in (9, 10)])
+
+
 def clean_extracted_text(text):
     """Clean PDF-extracted text before chunking.
 
@@ -134,8 +247,6 @@ def clean_extracted_text(text):
     - Control characters (\\u0003, etc.)
     - Excessive whitespace
     """
-    import re
-
     lines = text.split('\n')
     cleaned_lines = []
 
@@ -157,18 +268,15 @@ def clean_extracted_text(text):
             continue
 
         # Remove standalone page headers/footers like "ATP 2-01.3 iii" or "1 March 2019 ATP 2-01.3 v"
-        if re.match(r'^[\divxlc\s\-]*ATP\s+\d[\d\-\.]*[\divxlc\s]*$', stripped, re.IGNORECASE):
-            continue
-        if re.match(r'^\d+\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\s+ATP', stripped, re.IGNORECASE):
+        if _PAGE_HEADER_RE.match(stripped):
             continue
 
-        # Strip control characters (ASCII 0-31 except newline \n=10, tab \t=9)
-        cleaned = ''.join(c for c in line if ord(c) >= 32 or c in '\t')
-        cleaned_lines.append(cleaned)
+        cleaned_lines.append(line)
 
-    # Rejoin and collapse 3+ consecutive newlines to 2
-    result = '\n'.join(cleaned_lines)
-    result = re.sub(r'\n{3,}', '\n\n', result)
+    # Rejoin, strip control characters in one pass (newlines are kept by the
+    # table) and collapse 3+ consecutive newlines to 2
+    result = '\n'.join(cleaned_lines).translate(_CTRL_TABLE)
+    result = _EXCESS_NEWLINES_RE.sub('\n\n', result)
 
     logger.info(f"Cleaned text: {len(text)} -> {len(result)} chars ({len(text) - len(result)} removed)")
     return result
@@ -176,64 +284,130 @@ def clean_extracted_text(text):
 
 # ============== Parent Chunk Store ==============
 
+# get_many looks ids up in fixed-size IN (...) batches, well under SQLite's
+# bound-parameter limit (999 on builds older than 3.32). Full batches all
+# share one SQL string, so the connection's statement cache reuses it.
+_GET_MANY_BATCH = 256
+_GET_MANY_SQL = "SELECT parent_id, content, source, chunk_index, page FROM parent_chunks WHERE parent_id IN ({})"
+_GET_MANY_FULL_SQL = _GET_MANY_SQL.format(",".join("?" * _GET_MANY_BATCH))
+
+
 class ParentChunkStore:
-    """SQLite-backed store for parent chunks used in hierarchical retrieval."""
+    """SQLite-backed store for parent chunks used in hierarchical retrieval.
+
+    Keeps one connection open for the life of the store; calls from
+    different request threads are serialized with a lock.
+    """
 
     def __init__(self, db_path):
         self.db_path = db_path
-        self._init_db()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.reopen()
+
+    def reopen(self):
+        """(Re)connect to db_path, e.g. after the database file was deleted.
+
+        The store object stays the same, so every service holding it keeps
+        working.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._init_db()
 
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS parent_chunks (
-                parent_id TEXT PRIMARY KEY,
-                content TEXT NOT NULL,
-                source TEXT NOT NULL,
-                chunk_index INTEGER NOT NULL,
-                page TEXT DEFAULT ''
+        # Called from reopen() with the lock held
+        with self._conn as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS parent_chunks (
+                    parent_id TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    page TEXT DEFAULT ''
+                )
+            """)
+            # Covers get_by_source's WHERE source = ? ORDER BY chunk_index
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_parent_source ON parent_chunks (source, chunk_index)"
             )
-        """)
-        conn.commit()
-        conn.close()
 
     def add(self, parent_id, content, source, chunk_index, page=""):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            "INSERT OR REPLACE INTO parent_chunks (parent_id, content, source, chunk_index, page) VALUES (?, ?, ?, ?, ?)",
-            (parent_id, content, source, chunk_index, page)
-        )
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parent_chunks (parent_id, content, source, chunk_index, page) VALUES (?, ?, ?, ?, ?)",
+                (parent_id, content, source, chunk_index, page)
+            )
+
+    def add_many(self, rows):
+        """Insert (parent_id, content, source, chunk_index, page) rows in one transaction."""
+        with self._lock, self._conn as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO parent_chunks (parent_id, content, source, chunk_index, page) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
 
     def update_page(self, parent_id, page):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            "UPDATE parent_chunks SET page = ? WHERE parent_id = ?",
-            (page, parent_id)
-        )
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "UPDATE parent_chunks SET page = ? WHERE parent_id = ?",
+                (page, parent_id)
+            )
+
+    def update_pages_many(self, updates):
+        """Apply (page, parent_id) updates in one transaction."""
+        with self._lock, self._conn as conn:
+            conn.executemany(
+                "UPDATE parent_chunks SET page = ? WHERE parent_id = ?",
+                updates
+            )
+
+    def get_by_source(self, source):
+        """Return (parent_id, content) rows for every parent of a source, in chunk order."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT parent_id, content FROM parent_chunks WHERE source = ? ORDER BY chunk_index",
+                (source,)
+            ).fetchall()
 
     def get_many(self, parent_ids):
-        conn = sqlite3.connect(self.db_path)
-        placeholders = ",".join("?" for _ in parent_ids)
-        rows = conn.execute(
-            f"SELECT parent_id, content, source, chunk_index, page FROM parent_chunks WHERE parent_id IN ({placeholders})",
-            parent_ids
-        ).fetchall()
-        conn.close()
-        return {row[0]: {"content": row[1], "source": row[2], "chunk_index": row[3], "page": row[4]} for row in rows}
+        """Fetch parents by id, returned in the order the ids were given."""
+        parent_ids = list(parent_ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(parent_ids), _GET_MANY_BATCH):
+                batch = parent_ids[start:start + _GET_MANY_BATCH]
+                if len(batch) == _GET_MANY_BATCH:
+                    sql = _GET_MANY_FULL_SQL
+                else:
+                    sql = _GET_MANY_SQL.format(",".join("?" * len(batch)))
+                rows = self._conn.execute(sql, batch).fetchall()
+                for row in rows:
+                    found[row[0]] = {"content": row[1], "source": row[2], "chunk_index": row[3], "page": row[4]}
+        return {pid: found[pid] for pid in parent_ids if pid in found}
 
     def clear(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("DELETE FROM parent_chunks")
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn as conn:
+            conn.execute("DELETE FROM parent_chunks")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
 
 
 # ============== Text Chunking ==============
 
+# Characters that are neither alphanumeric nor whitespace (\w also covers "_")
+_PUNCT_RE = re.compile(r'[^\w\s]|_')
+
+
 def is_valid_chunk(text):
     """Check if a chunk has meaningful content.
 
@@ -245,12 +419,27 @@ def is_valid_chunk(text):
     if len(stripped) < Config.MIN_CHUNK_CHARS:
         return False
     # Reject if <60% alphanumeric characters
-    alnum_count = sum(c.isalnum() or c.isspace() for c in stripped)
+    alnum_count = len(stripped) - len(_PUNCT_RE.findall(stripped))
     if alnum_count < len(stripped) * 0.6:
         return False
     return True
 
 
+_CHUNK_SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""]
+
+# Splitters are stateless, so build them once rather than per document
+_parent_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=Config.PARENT_CHUNK_SIZE,
+    chunk_overlap=Config.PARENT_CHUNK_OVERLAP,
+    separators=_CHUNK_SEPARATORS
+)
+_child_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=Config.CHILD_CHUNK_SIZE,
+    chunk_overlap=Config.CHILD_CHUNK_OVERLAP,
+    separators=_CHUNK_SEPARATORS
+)
+
+
 def create_hierarchical_chunks(text, source_name, parent_store):
     """Create parent-child chunk hierarchy for doctrine documents.
 
@@ -259,23 +448,12 @@ def create_hierarchical_chunks(text, source_name, parent_store):
     child matches — giving both search precision and rich context.
     """
     # Step 1: Split into parent chunks (sent to LLM as context)
-    parent_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=Config.PARENT_CHUNK_SIZE,
-        chunk_overlap=Config.PARENT_CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""]
-    )
-    parent_texts = parent_splitter.split_text(text)
+    parent_texts = _parent_splitter.split_text(text)
 
     # Step 2: For each parent, create child chunks and link them
-    child_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=Config.CHILD_CHUNK_SIZE,
-        chunk_overlap=Config.CHILD_CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""]
-    )
-
     child_documents = []
+    parent_rows = []
     filtered_count = 0
-    parent_count = 0
 
     for parent_idx, parent_text in enumerate(parent_texts):
         if not is_valid_chunk(parent_text):
@@ -284,12 +462,11 @@ def create_hierarchical_chunks(text, source_name, parent_store):
 
         parent_id = f"{source_name}::parent_{parent_idx}"
 
-        # Store parent in SQLite
-        parent_store.add(parent_id, parent_text, source_name, parent_idx)
-        parent_count += 1
+        # Queue parent for SQLite (written in one batch below)
+        parent_rows.append((parent_id, parent_text, source_name, parent_idx, ""))
 
         # Split parent into children
-        child_texts = child_splitter.split_text(parent_text)
+        child_texts = _child_splitter.split_text(parent_text)
 
         for child_idx, child_text in enumerate(child_texts):
             if not is_valid_chunk(child_text):
@@ -306,8 +483,11 @@ def create_hierarchical_chunks(text, source_name, parent_store):
                 }
             ))
 
+    if parent_rows:
+        parent_store.add_many(parent_rows)
+
     logger.info(
-        f"Hierarchical chunking: {parent_count} parents -> "
+        f"Hierarchical chunking: {len(parent_rows)} parents -> "
         f"{len(child_documents)} children (filtered {filtered_count} invalid)"
     )
     return child_documents
@@ -343,11 +523,9 @@ def similarity_search(query, vectorstore, k=10, min_score=None):
 
 def resolve_parents(child_docs, parent_store):
     """Given retrieved child documents, fetch and deduplicate their parent chunks."""
-    seen_parent_ids = []
-    for doc in child_docs:
-        pid = doc.metadata.get("parent_id")
-        if pid and pid not in seen_parent_ids:
-            seen_parent_ids.append(pid)
+    # dict.fromkeys dedupes in O(1) per id while keeping first-seen order
+    parent_ids = (doc.metadata.get("parent_id") for doc in child_docs)
+    seen_parent_ids = list(dict.fromkeys(pid for pid in parent_ids if pid))
 
     if not seen_parent_ids:
         # Fallback: return children as-is (e.g., legacy chunks without parent_id)
@@ -376,69 +554,102 @@ def resolve_parents(child_docs, parent_store):
 
 # ============== Page Annotation ==============
 
-def _lookup_page(offset, page_offsets):
-    """Given a character offset and a sorted list of (start_offset, page_num),
-    return the page number that contains that offset."""
-    page = page_offsets[0][1] if page_offsets else 1
-    for start, pnum in page_offsets:
-        if start > offset:
-            break
-        page = pnum
-    return page
+def _page_index(page_offsets):
+    """Split a sorted list of (start_offset, page_num) into parallel
+    (starts, page_nums) tuples for _lookup_page."""
+    if not page_offsets:
+        return (), ()
+    starts, page_nums = zip(*page_offsets)
+    return starts, page_nums
+
+
+def _lookup_page(offset, starts, page_nums):
+    """Given a character offset and the (starts, page_nums) index built by
+    _page_index, return the page number that contains that offset."""
+    if not page_nums:
+        return 1
+    i = bisect.bisect_right(starts, offset) - 1
+    return page_nums[i] if i >= 0 else page_nums[0]
 
 
 def annotate_chunks_with_pages(chunks, raw_text, page_offsets):
     """Set metadata['page'] on each chunk based on where its text appears in raw_text."""
+    starts, page_nums = _page_index(page_offsets)
+    # Chunks come out of the splitter in document order, so each search can
+    # start just past the previous hit instead of rescanning from the top.
+    # Chunks overlap, so the cursor only moves one character past a hit.
+    search_from = 0
     for chunk in chunks:
-        idx = raw_text.find(chunk.page_content[:80])
+        prefix = chunk.page_content[:80]
+        idx = raw_text.find(prefix, search_from)
         if idx >= 0:
-            chunk.metadata["page"] = str(_lookup_page(idx, page_offsets))
+            search_from = idx + 1
+        else:
+            idx = raw_text.find(prefix)
+        if idx >= 0:
+            chunk.metadata["page"] = str(_lookup_page(idx, starts, page_nums))
         else:
             chunk.metadata["page"] = ""
 
 
 def update_parent_pages(parent_store, raw_text, page_offsets, source_name):
     """Update page info for all parent chunks of a given source."""
-    conn = __import__('sqlite3').connect(parent_store.db_path)
-    rows = conn.execute(
-        "SELECT parent_id, content FROM parent_chunks WHERE source = ?",
-        (source_name,)
-    ).fetchall()
-    conn.close()
+    rows = parent_store.get_by_source(source_name)
 
+    starts, page_nums = _page_index(page_offsets)
+    updates = []
+    # Rows are in chunk order, so search from a cursor as in
+    # annotate_chunks_with_pages
+    search_from = 0
     for parent_id, content in rows:
-        idx = raw_text.find(content[:80])
+        prefix = content[:80]
+        idx = raw_text.find(prefix, search_from)
         if idx >= 0:
-            page = str(_lookup_page(idx, page_offsets))
-            parent_store.update_page(parent_id, page)
+            search_from = idx + 1
+        else:
+            idx = raw_text.find(prefix)
+        if idx >= 0:
+            updates.append((str(_lookup_page(idx, starts, page_nums)), parent_id))
+
+    if updates:
+        parent_store.update_pages_many(updates)
+
+
+_QUERY_EXPANSIONS = {
+    "what's": "what is",
+    "whats": "what is",
+    "it's": "it is",
+    "its": "it is",
+    "dont": "do not",
+    "can't": "cannot",
+    "won't": "will not",
+    "img": "image",
+    "pic": "picture",
+    "doc": "document",
+    "info": "information"
+}
+
+# One pass over the query; \b keeps "doc" in "document" or "its" in
+# "visits" from being expanded
+_QUERY_EXPANSION_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, sorted(_QUERY_EXPANSIONS, key=len, reverse=True))) + r")\b"
+)
+
+_STOP_WORDS = frozenset((
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'about', 'into', 'through', 'during'
+))
 
 
 def preprocess_query(query):
     """Enhance query for better retrieval"""
-    expansions = {
-        "what's": "what is",
-        "whats": "what is",
-        "it's": "it is",
-        "its": "it is",
-        "dont": "do not",
-        "can't": "cannot",
-        "won't": "will not",
-        "img": "image",
-        "pic": "picture",
-        "doc": "document",
-        "info": "information"
-    }
-    
-    enhanced_query = query.lower()
-    for short, full in expansions.items():
-        enhanced_query = enhanced_query.replace(short, full)
-    
-    stop_words = {'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 
-                  'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 
-                  'should', 'may', 'might', 'must', 'can', 'in', 'on', 'at', 'to', 'for',
-                  'of', 'with', 'by', 'from', 'about', 'into', 'through', 'during'}
-    
+    enhanced_query = _QUERY_EXPANSION_RE.sub(
+        lambda m: _QUERY_EXPANSIONS[m.group(0)], query.lower()
+    )
+
     words = enhanced_query.split()
-    key_terms = [w for w in words if w not in stop_words and len(w) > 2]
-    
-    return enhanced_query, key_terms
\ No newline at end of file
+    key_terms = [w for w in words if w not in _STOP_WORDS and len(w) > 2]
+
+    return enhanced_query, key_terms